@@ -1,13 +1,22 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import Optional
+import asyncio
+import hashlib
+import inspect
 import logging
 import os
+import pickle
+import re
 import time
 import unicodedata
+from array import array
+from collections import OrderedDict
 import sqlite3
 import aiosqlite
+import numpy as np
 from rapidfuzz import fuzz, process
 from functools import lru_cache
 
@@ -30,7 +39,8 @@ class TranscriptionResponse(BaseModel):
     best_sggs_score: Optional[float]
     timestamp: float
 
-app = FastAPI(title="Bani AI Transcription", version="1.0.0")
+# orjson encodes the JSON responses (Gurmukhi text included) faster than the stdlib json
+app = FastAPI(title="Bani AI Transcription", version="1.0.0", default_response_class=ORJSONResponse)
 
 # CORS middleware for frontend communication
 app.add_middleware(
@@ -45,24 +55,141 @@ app.add_middleware(
 from pathlib import Path
 
 DATABASE_PATH = Path(__file__).parent / "uploads" / "shabads_verses_SGGS.db"
-VERSES_DATA = []  # List of (ShabadID, GurmukhiUni) tuples
+# Building the search tables below takes seconds; they are pickled and reused while the database
+# file and the code that builds them are unchanged. The cache is unpickled at startup, so it must
+# only ever be writable by the deployment: it is kept beside the code rather than in uploads/.
+SEARCH_TABLES_CACHE_PATH = Path(__file__).parent / "search_tables.pkl"
+# Verses are stored as parallel tables rather than a list of (ShabadID, GurmukhiUni)
+# tuples: the text list is handed to rapidfuzz as-is, and the ShabadIDs live in a
+# fixed-width int32 table instead of one tuple + int object per verse.
+VERSE_TEXTS = []  # GurmukhiUni per verse, NFC-normalized
+VERSE_SHABAD_IDS = array("i")  # ShabadID per verse, same index as VERSE_TEXTS
+VERSE_INDEX_BY_TEXT = {}  # Verse text -> index of its first occurrence
+VERSE_FIRST_LETTERS = []  # First-letter abbreviation per verse, e.g. "ਸਨਕਪ"
+FIRST_LETTERS_INDEX = {}  # First-letter abbreviation -> list of verse indices
+WORD_INDEX = {}  # Word -> int32 array of indices of verses containing it
 DATABASE_LOADED = False
+LOADED_DATABASE_SIGNATURE = None  # get_database_signature() of the database the verses came from
 FUZZY_THRESHOLD = float(os.getenv("FUZZY_MATCH_THRESHOLD", "60"))
+# Minimum best window score for a candidate stage to answer a query without the full scan. A
+# small candidate set often holds an unrelated verse scoring just over FUZZY_THRESHOLD, so only a
+# near-certain match may stand in for scoring every verse
+CANDIDATE_ACCEPT_SCORE = float(os.getenv("CANDIDATE_ACCEPT_SCORE", "95"))
+# Shorter abbreviations are shared by too many verses to narrow the search
+FIRST_LETTERS_MIN_WORDS = int(os.getenv("FIRST_LETTERS_MIN_WORDS", "4"))
+
+# Speech recognition resends near-identical partial transcriptions; a session's next
+# transcription scoring above this ratio against its last one reuses the last search result
+REPEAT_TRANSCRIPTION_RATIO = float(os.getenv("REPEAT_TRANSCRIPTION_RATIO", "95"))
+# Sessions whose last search is kept; the least recently active one is forgotten beyond this
+MAX_TRACKED_SESSIONS = int(os.getenv("MAX_TRACKED_SESSIONS", "1024"))
+LAST_SEARCH_BY_SESSION = OrderedDict()  # session_id -> (transcribed_text, search result)
+
+# Any character from the Gurmukhi Unicode block
+GURMUKHI_RE = re.compile(r"[\u0A00-\u0A7F]")
+
+def get_first_letters(text: str) -> str:
+    """First letter of every word, skipping punctuation and numerals ('ਸਤਿ ਨਾਮੁ ॥੧॥' -> 'ਸਨ')"""
+    return "".join(word[0] for word in text.split() if word[0].isalpha())
+
+def build_search_tables(rows) -> dict:
+    """Verse tables and search indexes for the (ShabadID, GurmukhiUni) rows of the Verse table"""
+    verse_texts = [unicodedata.normalize('NFC', row[1]) for row in rows]
+    verse_shabad_ids = array("i", (row[0] for row in rows))
+    
+    verse_index_by_text = {}
+    for verse_idx, text in enumerate(verse_texts):
+        verse_index_by_text.setdefault(text, verse_idx)
+    
+    verse_first_letters = [get_first_letters(text) for text in verse_texts]
+    first_letters_index = {}
+    for verse_idx, first_letters in enumerate(verse_first_letters):
+        first_letters_index.setdefault(first_letters, []).append(verse_idx)
+    
+    word_index = {}
+    for verse_idx, text in enumerate(verse_texts):
+        for word in set(text.split()):
+            word_index.setdefault(word, array("i")).append(verse_idx)
+    
+    return {
+        "verse_texts": verse_texts,
+        "verse_shabad_ids": verse_shabad_ids,
+        "verse_index_by_text": verse_index_by_text,
+        "verse_first_letters": verse_first_letters,
+        "first_letters_index": first_letters_index,
+        "word_index": word_index,
+    }
+
+
+# Tables pickled by other code may differ in shape or content, so the cache is keyed on the source
+# of the functions that build them (and the Unicode data behind NFC) instead of a version number
+# that has to be bumped by hand
+SEARCH_TABLES_CACHE_VERSION = hashlib.blake2b(
+    "".join([inspect.getsource(get_first_letters), inspect.getsource(build_search_tables), unicodedata.unidata_version]).encode(),
+    digest_size=8,
+).hexdigest()
+
+
+def get_database_signature() -> tuple:
+    """Identifies the database file contents: modification time and size"""
+    stat = DATABASE_PATH.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_cached_search_tables(database_signature: tuple) -> Optional[dict]:
+    """Search tables from the pickle cache, or None if it's missing, unreadable or was built from
+    another database or by other code"""
+    try:
+        with open(SEARCH_TABLES_CACHE_PATH, "rb") as cache_file:
+            cache_key, tables = pickle.load(cache_file)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable search tables cache {SEARCH_TABLES_CACHE_PATH}: {e}")
+        return None
+    return tables if cache_key == (SEARCH_TABLES_CACHE_VERSION, database_signature) else None
+
+
+def save_search_tables_cache(tables: dict, database_signature: tuple):
+    """Pickle the search tables; a failure only costs the next startup time"""
+    try:
+        # Write to a temporary file first so a concurrent startup never reads a partial cache
+        temporary_path = SEARCH_TABLES_CACHE_PATH.with_name(f"{SEARCH_TABLES_CACHE_PATH.name}.{os.getpid()}.tmp")
+        with open(temporary_path, "wb") as cache_file:
+            pickle.dump(((SEARCH_TABLES_CACHE_VERSION, database_signature), tables), cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, SEARCH_TABLES_CACHE_PATH)
+    except Exception as e:
+        logger.warning(f"Could not write search tables cache {SEARCH_TABLES_CACHE_PATH}: {e}")
+
 
 # Async loading of database verses
 async def load_database_verses():
     """Asynchronously load all verses from SQLite database"""
-    global VERSES_DATA, DATABASE_LOADED
+    global VERSE_TEXTS, VERSE_SHABAD_IDS, VERSE_INDEX_BY_TEXT, VERSE_FIRST_LETTERS, FIRST_LETTERS_INDEX, WORD_INDEX, DATABASE_LOADED, LOADED_DATABASE_SIGNATURE
     
     if DATABASE_PATH.exists():
         try:
-            async with aiosqlite.connect(DATABASE_PATH) as db:
-                async with db.execute("SELECT ShabadID, GurmukhiUni FROM Verse") as cursor:
-                    rows = await cursor.fetchall()
-                    VERSES_DATA = [(row[0], unicodedata.normalize('NFC', row[1])) for row in rows]
+            database_signature = get_database_signature()
+            tables = load_cached_search_tables(database_signature)
+            if tables is None:
+                async with aiosqlite.connect(DATABASE_PATH) as db:
+                    async with db.execute("SELECT ShabadID, GurmukhiUni FROM Verse") as cursor:
+                        rows = await cursor.fetchall()
+                tables = build_search_tables(rows)
+                save_search_tables_cache(tables, database_signature)
+            else:
+                logger.info(f"Loaded search tables from cache {SEARCH_TABLES_CACHE_PATH}")
+            
+            VERSE_TEXTS = tables["verse_texts"]
+            VERSE_SHABAD_IDS = tables["verse_shabad_ids"]
+            VERSE_INDEX_BY_TEXT = tables["verse_index_by_text"]
+            VERSE_FIRST_LETTERS = tables["verse_first_letters"]
+            FIRST_LETTERS_INDEX = tables["first_letters_index"]
+            WORD_INDEX = tables["word_index"]
             
+            LOADED_DATABASE_SIGNATURE = database_signature
             DATABASE_LOADED = True
-            logger.info(f"Loaded {len(VERSES_DATA)} verses from database for fuzzy search.")
+            logger.info(f"Loaded {len(VERSE_TEXTS)} verses from database for fuzzy search.")
         except Exception as e:
             logger.error(f"Error loading database: {e}")
             DATABASE_LOADED = False
@@ -70,54 +197,75 @@ async def load_database_verses():
         logger.warning(f"Database not found at {DATABASE_PATH}. Fuzzy search will be disabled.")
 
 
+def get_first_letter_candidates(query: str):
+    """Indices of verses whose first-letter abbreviation matches the query's exactly"""
+    first_letters = get_first_letters(query)
+    if len(first_letters) < FIRST_LETTERS_MIN_WORDS:
+        return []
+    return FIRST_LETTERS_INDEX.get(first_letters, [])
 
-@lru_cache(maxsize=1000)
-def fuzzy_search_database(query: str, threshold: float = FUZZY_THRESHOLD):
-    """Fuzzy search with sliding windows using database verses - BATCH OPTIMIZED"""
-    logger.info(f"DEBUG SEARCH: Starting search for query='{query}', threshold={threshold}")
-    
-    if not DATABASE_LOADED or not query.strip():
-        logger.info("DEBUG SEARCH: Database not loaded or empty query")
-        return None, None, None
-    
-    normalized_query = unicodedata.normalize('NFC', query.strip())
-    
-    # Step 1: Batch process all verses using rapidfuzz.process for optimal performance
-    logger.info(f"DEBUG SEARCH: Step 1 - Batch scoring all {len(VERSES_DATA)} verses with rapidfuzz.process")
+
+def get_candidate_lines_from_index(query: str):
+    """Indices of verses containing every word of the query, in verse order"""
+    posting_lists = sorted((WORD_INDEX.get(word, ()) for word in set(query.split())), key=len)
+    if not posting_lists or not posting_lists[0]:
+        return []
+    # Intersect starting from the rarest word so the working set stays small
+    candidates = set(posting_lists[0])
+    for postings in posting_lists[1:]:
+        candidates.intersection_update(postings)
+        if not candidates:
+            return []
+    return sorted(candidates)
+
+
+def score_verses(query: str, verse_indices=None, limit: int = 3):
+    """Top verses by ratio score as (verse_idx, shabad_id, verse_text, score) tuples.
+
+    Scores every verse, or only the given verse indices when provided.
+    """
+    if verse_indices is None:
+        # Full scan: cdist scores every verse in C++ split across all CPU cores, then numpy
+        # picks the best. Verses tied at the cut-off are ordered by index, like process.extract
+        scores = process.cdist([query], VERSE_TEXTS, scorer=fuzz.ratio, dtype=np.float64, workers=-1)[0]
+        limit = min(limit, len(scores))
+        cutoff_score = np.partition(scores, -limit)[-limit]
+        contenders = np.flatnonzero(scores >= cutoff_score)
+        best = contenders[np.argsort(-scores[contenders], kind="stable")[:limit]]
+        return [(int(i), VERSE_SHABAD_IDS[i], VERSE_TEXTS[i], float(scores[i])) for i in best]
     
-    # Extract just the verse texts for batch processing
-    verse_texts = [verse_text for shabad_id, verse_text in VERSES_DATA]
+    choices = [VERSE_TEXTS[i] for i in verse_indices]
     
-    # Use rapidfuzz.process.extract for batch processing - much faster than individual fuzz.ratio calls
-    # This uses optimized C++ implementation and can utilize multiple cores
-    batch_results = process.extract(
-        normalized_query, 
-        verse_texts, 
-        scorer=fuzz.ratio,
-        limit=len(verse_texts),  # Get all results
-        score_cutoff=0  # No cutoff, we'll filter later
-    )
+    # Use rapidfuzz.process.extract for batch processing - much faster than individual fuzz.ratio calls.
+    # Passing the limit lets rapidfuzz keep only the best matches instead of returning and
+    # sorting a score for every candidate
+    batch_results = process.extract(query, choices, scorer=fuzz.ratio, limit=limit)
     
     # Convert batch results back to our format with original indices and shabad_ids
-    all_scores = []
-    for verse_text, score, original_index in batch_results:
-        shabad_id = VERSES_DATA[original_index][0]  # Get shabad_id from original data
-        all_scores.append((original_index, shabad_id, verse_text, score))
-    
-    # Results from process.extract are already sorted by score (descending), so just take top 3
-    top_3 = all_scores[:3]
-    
-    logger.info("DEBUG SEARCH: Step 2 - Top 3 results by ratio score:")
-    for rank, (verse_idx, shabad_id, verse_text, score) in enumerate(top_3, 1):
-        logger.info(f"DEBUG SEARCH:   {rank}. Verse {verse_idx} (ShabadID: {shabad_id}): {score:.2f} | '{verse_text}'")
+    top_verses = []
+    for verse_text, score, choice_index in batch_results:
+        verse_idx = verse_indices[choice_index]
+        top_verses.append((verse_idx, VERSE_SHABAD_IDS[verse_idx], verse_text, score))
+    return top_verses
+
+
+def score_windows(normalized_query: str, top_3):
+    """Sliding windows around the top verses, scored and sorted best first.
+
+    Each window is (original_verse, shabad_id, score, window_type, start_idx, end_idx, verse_idx).
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("DEBUG SEARCH: Step 2 - Top 3 results by ratio score:")
+        for rank, (verse_idx, shabad_id, verse_text, score) in enumerate(top_3, 1):
+            logger.debug("DEBUG SEARCH:   %d. Verse %d (ShabadID: %d): %.2f | '%s'", rank, verse_idx, shabad_id, score, verse_text)
     
     # Step 3: Generate sliding windows for each top verse
-    logger.info("DEBUG SEARCH: Step 3 - Generating sliding windows for top 3 verses")
+    logger.debug("DEBUG SEARCH: Step 3 - Generating sliding windows for top 3 verses")
     seen_spans = set()
     window_candidates = []
     
     for rank, (verse_idx, shabad_id, verse_text, original_score) in enumerate(top_3, 1):
-        logger.info(f"DEBUG SEARCH: Processing rank {rank} verse {verse_idx} (score: {original_score:.2f})")
+        logger.debug("DEBUG SEARCH: Processing rank %d verse %d (score: %.2f)", rank, verse_idx, original_score)
         
         # Generate all window types for this verse
         windows = []
@@ -126,7 +274,7 @@ def fuzzy_search_database(query: str, threshold: float = FUZZY_THRESHOLD):
         windows.append((verse_idx, verse_idx, "single"))
         
         # Double-verse forward: (i, i+1)
-        if verse_idx + 1 < len(VERSES_DATA):
+        if verse_idx + 1 < len(VERSE_TEXTS):
             windows.append((verse_idx, verse_idx + 1, "double_fwd"))
         
         # Double-verse backward: (i-1, i)
@@ -134,11 +282,11 @@ def fuzzy_search_database(query: str, threshold: float = FUZZY_THRESHOLD):
             windows.append((verse_idx - 1, verse_idx, "double_bwd"))
         
         # Triple centered: (i-1, i, i+1)
-        if verse_idx - 1 >= 0 and verse_idx + 1 < len(VERSES_DATA):
+        if verse_idx - 1 >= 0 and verse_idx + 1 < len(VERSE_TEXTS):
             windows.append((verse_idx - 1, verse_idx + 1, "triple_center"))
         
         # Triple forward: (i, i+1, i+2)
-        if verse_idx + 2 < len(VERSES_DATA):
+        if verse_idx + 2 < len(VERSE_TEXTS):
             windows.append((verse_idx, verse_idx + 2, "triple_fwd"))
         
         # Triple backward: (i-2, i-1, i)
@@ -156,11 +304,10 @@ def fuzzy_search_database(query: str, threshold: float = FUZZY_THRESHOLD):
                 
                 # Create span text
                 if start_idx == end_idx:
-                    span_text = VERSES_DATA[start_idx][1]
-                    span_shabad_id = VERSES_DATA[start_idx][0]
+                    span_text = VERSE_TEXTS[start_idx]
+                    span_shabad_id = VERSE_SHABAD_IDS[start_idx]
                 else:
-                    span_verses = [VERSES_DATA[i][1] for i in range(start_idx, end_idx + 1)]
-                    span_text = " ".join(span_verses)
+                    span_text = " ".join(VERSE_TEXTS[start_idx:end_idx + 1])
                     # Use the ShabadID of the original matching verse
                     span_shabad_id = shabad_id
                 
@@ -177,21 +324,89 @@ def fuzzy_search_database(query: str, threshold: float = FUZZY_THRESHOLD):
                 
                # logger.info(f"DEBUG SEARCH:     {window_type} ({start_idx}-{end_idx}): {span_score:.2f} (ratio: {ratio_score:.1f}, partial: {partial_ratio_score:.1f}, token_set: {token_set_score:.1f}) | '{span_text[:60]}...'")
             else:
-                logger.info(f"DEBUG SEARCH:     {window_type} ({start_idx}-{end_idx}): DUPLICATE - skipped")
+                logger.debug("DEBUG SEARCH:     %s (%d-%d): DUPLICATE - skipped", window_type, start_idx, end_idx)
+    
+    window_candidates.sort(key=lambda x: x[2], reverse=True)
+    return window_candidates
+
+
+def fuzzy_search_database(query: str, threshold: float = FUZZY_THRESHOLD):
+    """Fuzzy search with sliding windows using database verses - BATCH OPTIMIZED"""
+    # Every verse is Gurmukhi, so a transcription without a single Gurmukhi character (a
+    # misrecognition in another script, or just whitespace) can't reach the threshold
+    if not GURMUKHI_RE.search(query):
+        return None, None, None
+    # Normalize before the cache lookup so transcriptions that differ only in surrounding
+    # whitespace or Unicode composition share a cache entry
+    return search_normalized_query(unicodedata.normalize('NFC', query.strip()), threshold)
+
+
+@lru_cache(maxsize=4096)
+def search_normalized_query(normalized_query: str, threshold: float):
+    """Cached body of fuzzy_search_database for an already stripped, NFC-normalized query"""
+    # Search tracing is logged at DEBUG level with lazy %-formatting, so under the default
+    # INFO level the per-query messages cost neither string formatting nor log I/O
+    logger.debug("DEBUG SEARCH: Starting search for query='%s', threshold=%s", normalized_query, threshold)
+    
+    if not DATABASE_LOADED or not normalized_query:
+        logger.debug("DEBUG SEARCH: Database not loaded or empty query")
+        return None, None, None
+    
+    # An exact verse scores 100 on every scorer, which no window can beat
+    exact_idx = VERSE_INDEX_BY_TEXT.get(normalized_query)
+    if exact_idx is not None:
+        logger.debug("DEBUG SEARCH: Exact verse match %d (ShabadID: %d)", exact_idx, VERSE_SHABAD_IDS[exact_idx])
+        return VERSE_TEXTS[exact_idx], VERSE_SHABAD_IDS[exact_idx], 100.0
+    
+    # Step 1: Score small candidate sets first - verses sharing the query's first-letter
+    # abbreviation, then verses sharing every word with it. A stage only answers the query when
+    # its best window reaches CANDIDATE_ACCEPT_SCORE; otherwise the next stage, and finally a
+    # batch scoring of every verse, is tried, keeping the windows already scored.
+    candidate_stages = (
+        ("first-letter", get_first_letter_candidates),
+        ("word index", get_candidate_lines_from_index),
+    )
+    window_candidates = []
+    for stage, get_candidates in candidate_stages:
+        candidates = get_candidates(normalized_query)
+        if not candidates:
+            continue
+        logger.debug("DEBUG SEARCH: Step 1 - Scoring %d %s candidates", len(candidates), stage)
+        top_3 = score_verses(normalized_query, candidates)
+        if top_3[0][3] < threshold:
+            logger.debug("DEBUG SEARCH: No %s candidate above threshold", stage)
+            continue
+        stage_windows = score_windows(normalized_query, top_3)
+        if stage_windows[0][2] >= max(threshold, CANDIDATE_ACCEPT_SCORE):
+            window_candidates = stage_windows
+            break
+        logger.debug("DEBUG SEARCH: No %s window above threshold", stage)
+        window_candidates.extend(stage_windows)
+    else:
+        logger.debug("DEBUG SEARCH: Step 1 - Batch scoring all %d verses with rapidfuzz.process", len(VERSE_TEXTS))
+        # Full-scan windows go first so that, on equal scores, they win over candidate windows
+        window_candidates = score_windows(normalized_query, score_verses(normalized_query)) + window_candidates
+        window_candidates.sort(key=lambda x: x[2], reverse=True)
     
     # Step 4: Find the highest scoring window
     if not window_candidates:
-        logger.info("DEBUG SEARCH: No window candidates generated")
+        logger.debug("DEBUG SEARCH: No window candidates generated")
         return None, None, None
     
-    window_candidates.sort(key=lambda x: x[2], reverse=True)
     best_verse, best_shabad_id, best_score, best_type, best_start, best_end, original_verse_idx = window_candidates[0]
     
-    logger.info("DEBUG SEARCH: Step 4 - Final window results (top 5):")
-    for i, (verse_text, shabad_id, score, window_type, start_idx, end_idx, orig_idx) in enumerate(window_candidates[:5], 1):
-        logger.info(f"DEBUG SEARCH:   {i}. {window_type} ({start_idx}-{end_idx}) from original verse {orig_idx}: {score:.2f} , (ShabadID: {shabad_id}) | '{verse_text[:60]}...'")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("DEBUG SEARCH: Step 4 - Final window results (top 5):")
+        for i, (verse_text, shabad_id, score, window_type, start_idx, end_idx, orig_idx) in enumerate(window_candidates[:5], 1):
+            logger.debug(
+                "DEBUG SEARCH:   %d. %s (%d-%d) from original verse %d: %.2f , (ShabadID: %d) | '%s...'",
+                i, window_type, start_idx, end_idx, orig_idx, score, shabad_id, verse_text[:60]
+            )
     
-    logger.info(f"DEBUG SEARCH: FINAL RESULT - Best window: {best_type} ({best_start}-{best_end}) with score {best_score:.2f} , Returning ShabadID {best_shabad_id} with verse: '{best_verse}'")
+    logger.debug(
+        "DEBUG SEARCH: FINAL RESULT - Best window: %s (%d-%d) with score %.2f , Returning ShabadID %d with verse: '%s'",
+        best_type, best_start, best_end, best_score, best_shabad_id, best_verse
+    )
 
     # Return the best result if above threshold
     if best_score >= threshold:
@@ -199,7 +414,7 @@ def fuzzy_search_database(query: str, threshold: float = FUZZY_THRESHOLD):
     # elif best_score >= 55:  # I want to be more strict about the threshold of 60, so we are not returning any matches below 60
       #  return best_verse, best_shabad_id, best_score
     else:
-        logger.info("DEBUG SEARCH: No matches found above threshold")
+        logger.debug("DEBUG SEARCH: No matches found above threshold")
         return None, None, None
 
 
@@ -212,17 +427,32 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "Bani AI Transcription"}
 
-@app.post("/api/transcribe")
-async def transcribe_and_search(request: TranscriptionRequest) -> TranscriptionResponse:
+@app.post("/api/transcribe", response_model=TranscriptionResponse)
+async def transcribe_and_search(request: TranscriptionRequest) -> ORJSONResponse:
     """Process transcription and return database fuzzy search results"""
     transcribed_text = request.text
     confidence = request.confidence
     
-    logger.info(f"Received transcription: {transcribed_text} (confidence: {confidence})")
+    logger.info("Received transcription: %s (confidence: %s)", transcribed_text, confidence)
 
-    # Fuzzy search database
-    best_verse, best_shabad_id, best_score = fuzzy_search_database(transcribed_text, FUZZY_THRESHOLD)
-    logger.info(f"Fuzzy search threshold: {FUZZY_THRESHOLD}")
+    session_id = request.session_id
+    last_search = LAST_SEARCH_BY_SESSION.get(session_id) if session_id else None
+    if last_search and fuzz.ratio(last_search[0], transcribed_text) > REPEAT_TRANSCRIPTION_RATIO:
+        logger.debug("Transcription repeats the last one searched in this session; reusing its result")
+        best_verse, best_shabad_id, best_score = last_search[1]
+        LAST_SEARCH_BY_SESSION.move_to_end(session_id)
+    else:
+        # Fuzzy search database (CPU-bound, so run it off the event loop)
+        best_verse, best_shabad_id, best_score = await asyncio.to_thread(
+            fuzzy_search_database, transcribed_text, FUZZY_THRESHOLD
+        )
+        if session_id:
+            # Compare against the text actually searched, so gradual drift still triggers a search
+            LAST_SEARCH_BY_SESSION[session_id] = (transcribed_text, (best_verse, best_shabad_id, best_score))
+            LAST_SEARCH_BY_SESSION.move_to_end(session_id)
+            if len(LAST_SEARCH_BY_SESSION) > MAX_TRACKED_SESSIONS:
+                LAST_SEARCH_BY_SESSION.popitem(last=False)
+    logger.debug("Fuzzy search threshold: %s", FUZZY_THRESHOLD)
     
     sggs_match_found = False
     shabad_id = 0
@@ -233,47 +463,65 @@ async def transcribe_and_search(request: TranscriptionRequest) -> TranscriptionR
         shabad_id = best_shabad_id
         best_sggs_match = best_verse
         best_sggs_score = best_score
-        logger.info(f"Best fuzzy match: Score={best_score:.2f}, ShabadID={best_shabad_id}")
-        logger.info(f"Verse: '{best_verse}'")
-        logger.info(f"Transcription: '{transcribed_text}'")
+        logger.info("Best fuzzy match: Score=%.2f, ShabadID=%d", best_score, best_shabad_id)
+        logger.debug("Verse: '%s'", best_verse)
+        logger.debug("Transcription: '%s'", transcribed_text)
         
         if best_score >= FUZZY_THRESHOLD:
             sggs_match_found = True
         else:
-            logger.info(f"Best match below threshold ({FUZZY_THRESHOLD}). No match used.")
+            logger.info("Best match below threshold (%s). No match used.", FUZZY_THRESHOLD)
     else:
         logger.info("No fuzzy matches found at all.")
 
-    return TranscriptionResponse(
-        transcribed_text=transcribed_text,
-        confidence=confidence,
-        sggs_match_found=sggs_match_found,
-        shabad_id=shabad_id,
-        best_sggs_match=best_sggs_match,
-        best_sggs_score=best_sggs_score,
-        timestamp=time.time()
-    )
+    # Returning the response directly skips FastAPI's response_model validation and
+    # jsonable_encoder pass; the fields below already match TranscriptionResponse
+    return ORJSONResponse({
+        "transcribed_text": transcribed_text,
+        "confidence": confidence,
+        "sggs_match_found": sggs_match_found,
+        "shabad_id": shabad_id,
+        "best_sggs_match": best_sggs_match,
+        "best_sggs_score": best_sggs_score,
+        "timestamp": time.time()
+    })
 
 
 
 @app.get("/api/test-database-search")
-async def test_database_search_endpoint(query: str):
+async def test_database_search_endpoint(query: str, request: Request, response: Response):
     """Test endpoint to check database fuzzy search functionality"""
-    best_verse, best_shabad_id, best_score = fuzzy_search_database(query)
+    configuration = {
+        "fuzzy_threshold": FUZZY_THRESHOLD,
+        "candidate_accept_score": CANDIDATE_ACCEPT_SCORE,
+        "first_letters_min_words": FIRST_LETTERS_MIN_WORDS,
+        "weighted_scoring": "0.3*ratio + 0.4*partial_ratio + 0.3*token_set_ratio"
+    }
+    
+    # Once the verses are loaded the result depends only on the query, the database file and
+    # the configuration, so let browsers/CDNs revalidate with an ETag instead of re-running the
+    # search. no-cache makes them revalidate on every request, so a redeployed database or
+    # changed configuration is picked up immediately
+    if DATABASE_LOADED:
+        cache_key = f"{query}|{LOADED_DATABASE_SIGNATURE}|{sorted(configuration.items())}"
+        etag = f'"{hashlib.blake2b(cache_key.encode(), digest_size=8).hexdigest()}"'
+        cache_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=cache_headers)
+        response.headers.update(cache_headers)
+    
+    best_verse, best_shabad_id, best_score = await asyncio.to_thread(fuzzy_search_database, query)
     
     return {
         "query": query,
         "database_loaded": DATABASE_LOADED,
-        "total_verses": len(VERSES_DATA),
+        "total_verses": len(VERSE_TEXTS),
         "best_match": {
             "verse": best_verse,
             "shabad_id": best_shabad_id,
             "score": best_score
         } if best_verse else None,
-        "configuration": {
-            "fuzzy_threshold": FUZZY_THRESHOLD,
-            "weighted_scoring": "0.3*ratio + 0.4*partial_ratio + 0.3*token_set_ratio"
-        }
+        "configuration": configuration
     }
 
 @app.on_event("startup")
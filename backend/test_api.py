@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests for the API endpoints' reuse of search results: HTTP caching of the test search and the
+per-session reuse of repeated transcriptions
+
+The search itself is replaced by a stub that counts its calls, so these run without the
+verse database.
+"""
+
+import sys
+from collections import OrderedDict
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from rapidfuzz import fuzz
+
+# Add backend to path
+sys.path.append(str(Path(__file__).parent))
+
+import main
+
+MATCH = ("ਸਤਿ ਨਾਮੁ", 1, 100.0)
+TRANSCRIPTION = "ਸੋ ਦਰੁ ਕੇਹਾ ਸੋ ਘਰੁ ਕੇਹਾ ਜਿਤੁ ਬਹਿ ਸਰਬ ਸਮਾਲੇ"
+
+
+@pytest.fixture
+def search_calls(monkeypatch):
+    """Queries passed to fuzzy_search_database, which returns MATCH for every query"""
+    calls = []
+
+    def fake_fuzzy_search_database(query, threshold=main.FUZZY_THRESHOLD):
+        calls.append(query)
+        return MATCH
+
+    monkeypatch.setattr(main, "fuzzy_search_database", fake_fuzzy_search_database)
+    monkeypatch.setattr(main, "DATABASE_LOADED", True)
+    monkeypatch.setattr(main, "LOADED_DATABASE_SIGNATURE", (1, 1000))
+    monkeypatch.setattr(main, "LAST_SEARCH_BY_SESSION", OrderedDict())
+    return calls
+
+
+def transcribe(client, text, session_id):
+    response = client.post("/api/transcribe", json={"text": text, "confidence": 0.9, "session_id": session_id})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_search_revalidates_with_etag(search_calls):
+    client = TestClient(main.app)
+
+    response = client.get("/api/test-database-search", params={"query": "ਸਤਿ ਨਾਮੁ"})
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "no-cache"
+    etag = response.headers["ETag"]
+
+    # A matching If-None-Match gets a 304 with the cache headers and no search
+    response = client.get("/api/test-database-search", params={"query": "ਸਤਿ ਨਾਮੁ"}, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert search_calls == ["ਸਤਿ ਨਾਮੁ"]
+
+    # Another query doesn't match the ETag
+    response = client.get("/api/test-database-search", params={"query": "ਵਾਹਿਗੁਰੂ"}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert search_calls == ["ਸਤਿ ਨਾਮੁ", "ਵਾਹਿਗੁਰੂ"]
+
+
+def test_search_etag_changes_with_database(search_calls, monkeypatch):
+    client = TestClient(main.app)
+    etag = client.get("/api/test-database-search", params={"query": "ਸਤਿ ਨਾਮੁ"}).headers["ETag"]
+
+    # A replaced database file must not be answered from a response built from the old one
+    monkeypatch.setattr(main, "LOADED_DATABASE_SIGNATURE", (2, 1000))
+    response = client.get("/api/test-database-search", params={"query": "ਸਤਿ ਨਾਮੁ"}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_search_not_cached_before_database_loads(search_calls, monkeypatch):
+    monkeypatch.setattr(main, "DATABASE_LOADED", False)
+    response = TestClient(main.app).get("/api/test-database-search", params={"query": "ਸਤਿ ਨਾਮੁ"})
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+
+
+def test_repeated_transcription_reuses_last_search(search_calls):
+    client = TestClient(main.app)
+    transcribe(client, TRANSCRIPTION, "session-1")
+
+    # One more character scores above REPEAT_TRANSCRIPTION_RATIO against the searched text
+    result = transcribe(client, TRANSCRIPTION + " ॥", "session-1")
+    assert search_calls == [TRANSCRIPTION]
+    assert result["sggs_match_found"]
+    assert result["shabad_id"] == MATCH[1]
+    assert result["best_sggs_match"] == MATCH[0]
+
+    # Another session has its own last search
+    transcribe(client, TRANSCRIPTION, "session-2")
+    assert search_calls == [TRANSCRIPTION, TRANSCRIPTION]
+
+
+def test_drifted_transcription_searches_again(search_calls):
+    client = TestClient(main.app)
+    transcribe(client, TRANSCRIPTION, "session-1")
+
+    # Grow the transcription a character at a time: every step repeats the previous one, so only
+    # the distance from the searched text can trigger the next search
+    drifted = TRANSCRIPTION
+    while len(search_calls) == 1:
+        previous, drifted = drifted, drifted + "ਵਾਹਿਗੁਰੂ"[len(drifted) - len(TRANSCRIPTION)]
+        assert fuzz.ratio(previous, drifted) > main.REPEAT_TRANSCRIPTION_RATIO
+        transcribe(client, drifted, "session-1")
+    assert search_calls == [TRANSCRIPTION, drifted]
+    assert fuzz.ratio(TRANSCRIPTION, drifted) <= main.REPEAT_TRANSCRIPTION_RATIO
+
+    # An unrelated transcription always searches
+    transcribe(client, "ਵਾਹਿਗੁਰੂ", "session-1")
+    assert search_calls == [TRANSCRIPTION, drifted, "ਵਾਹਿਗੁਰੂ"]
+
+
+def test_least_recently_active_session_is_forgotten(search_calls, monkeypatch):
+    monkeypatch.setattr(main, "MAX_TRACKED_SESSIONS", 2)
+    client = TestClient(main.app)
+    for session_id in ("session-1", "session-2", "session-3"):
+        transcribe(client, TRANSCRIPTION, session_id)
+    assert list(main.LAST_SEARCH_BY_SESSION) == ["session-2", "session-3"]
+
+    # The evicted session searches again; the tracked ones reuse their result
+    transcribe(client, TRANSCRIPTION, "session-3")
+    assert len(search_calls) == 3
+    transcribe(client, TRANSCRIPTION, "session-1")
+    assert len(search_calls) == 4
+    assert list(main.LAST_SEARCH_BY_SESSION) == ["session-3", "session-1"]
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Regression test for the database fuzzy search
+
+search_regression_cases.json holds the result of the original exhaustive search (every verse
+scored, no candidate stages) for a set of transcriptions and random verse fragments. The staged
+search must never return a worse match than that: a lower score, or a different shabad at the
+same score.
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend to path
+sys.path.append(str(Path(__file__).parent))
+
+from main import DATABASE_PATH, FUZZY_THRESHOLD, fuzzy_search_database, load_database_verses
+
+CASES_PATH = Path(__file__).parent / "search_regression_cases.json"
+
+
+def find_regressions():
+    """Cases where the search does worse than the exhaustive search, as (query, expected, actual)"""
+    asyncio.run(load_database_verses())
+    cases = json.loads(CASES_PATH.read_text(encoding="utf-8"))
+
+    regressions = []
+    for case in cases:
+        if case["score"] is None:
+            # The exhaustive search found no match, so any result is at least as good
+            continue
+        _, shabad_id, score = fuzzy_search_database(case["query"], FUZZY_THRESHOLD)
+        expected = (case["shabad_id"], case["score"])
+        if score is None or score < case["score"] - 1e-6:
+            regressions.append((case["query"], expected, (shabad_id, score)))
+        elif abs(score - case["score"]) <= 1e-6 and shabad_id != case["shabad_id"]:
+            regressions.append((case["query"], expected, (shabad_id, score)))
+    return regressions
+
+
+def test_search_never_worse_than_exhaustive_search():
+    if not DATABASE_PATH.exists():
+        pytest.skip(f"Database not found at {DATABASE_PATH}")
+    regressions = find_regressions()
+    assert not regressions, "\n".join(f"{query!r}: expected {expected}, got {actual}" for query, expected, actual in regressions)
+
+
+if __name__ == "__main__":
+    test_search_never_worse_than_exhaustive_search()
+    print("✅ No search regressions")
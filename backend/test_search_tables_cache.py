@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for the pickle cache of the search tables built at startup
+
+Each test uses a small verse database and cache file in a temporary directory.
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend to path
+sys.path.append(str(Path(__file__).parent))
+
+import main
+
+ROWS = [(1, "ਸਤਿ ਨਾਮੁ ਕਰਤਾ ਪੁਰਖੁ"), (1, "ਨਿਰਭਉ ਨਿਰਵੈਰੁ"), (2, "ਸਤਿ ਨਾਮੁ ਕਰਤਾ ਪੁਰਖੁ")]
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """Path of a verse database holding ROWS, with the cache beside it in the temporary directory"""
+    database_path = tmp_path / "verses.db"
+    with sqlite3.connect(database_path) as db:
+        db.execute("CREATE TABLE Verse (ShabadID INTEGER, GurmukhiUni TEXT)")
+        db.executemany("INSERT INTO Verse VALUES (?, ?)", ROWS)
+    db.close()
+
+    monkeypatch.setattr(main, "DATABASE_PATH", database_path)
+    monkeypatch.setattr(main, "SEARCH_TABLES_CACHE_PATH", tmp_path / "search_tables.pkl")
+    # load_database_verses replaces the loaded tables; restore them after the test
+    for name in ("VERSE_TEXTS", "VERSE_SHABAD_IDS", "VERSE_INDEX_BY_TEXT", "VERSE_FIRST_LETTERS",
+                 "FIRST_LETTERS_INDEX", "WORD_INDEX", "DATABASE_LOADED", "LOADED_DATABASE_SIGNATURE"):
+        monkeypatch.setattr(main, name, getattr(main, name))
+    return database_path
+
+
+def touch_later(path):
+    """Move the file's mtime a second on; writes within one filesystem clock tick keep it unchanged"""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_cache_round_trip(database):
+    tables = main.build_search_tables(ROWS)
+    signature = main.get_database_signature()
+    main.save_search_tables_cache(tables, signature)
+
+    assert main.load_cached_search_tables(signature) == tables
+    # Nothing is left behind from the atomic write
+    assert sorted(path.name for path in database.parent.iterdir()) == ["search_tables.pkl", "verses.db"]
+
+
+def test_cache_from_another_database_is_ignored(database):
+    signature = main.get_database_signature()
+    main.save_search_tables_cache(main.build_search_tables(ROWS), signature)
+
+    touch_later(database)
+    assert main.load_cached_search_tables(main.get_database_signature()) is None
+
+
+def test_cache_from_other_build_code_is_ignored(database, monkeypatch):
+    signature = main.get_database_signature()
+    main.save_search_tables_cache(main.build_search_tables(ROWS), signature)
+
+    monkeypatch.setattr(main, "SEARCH_TABLES_CACHE_VERSION", "built-by-other-code")
+    assert main.load_cached_search_tables(signature) is None
+
+
+def test_corrupt_cache_is_ignored(database):
+    main.SEARCH_TABLES_CACHE_PATH.write_bytes(b"not a pickle")
+    assert main.load_cached_search_tables(main.get_database_signature()) is None
+
+
+def test_cache_write_failure_is_not_fatal(database, monkeypatch):
+    monkeypatch.setattr(main, "SEARCH_TABLES_CACHE_PATH", database.parent / "missing" / "search_tables.pkl")
+    main.save_search_tables_cache(main.build_search_tables(ROWS), main.get_database_signature())
+    assert not main.SEARCH_TABLES_CACHE_PATH.exists()
+
+    # Startup still loads the verses, just without a cache for the next one
+    asyncio.run(main.load_database_verses())
+    assert main.DATABASE_LOADED
+    assert main.VERSE_TEXTS == [text for _, text in ROWS]
+
+
+def test_startup_rebuilds_only_when_database_changes(database, monkeypatch):
+    builds = []
+    build_search_tables = main.build_search_tables
+    monkeypatch.setattr(main, "build_search_tables", lambda rows: builds.append(rows) or build_search_tables(rows))
+
+    asyncio.run(main.load_database_verses())
+    asyncio.run(main.load_database_verses())
+    assert len(builds) == 1
+    assert main.VERSE_INDEX_BY_TEXT == {"ਸਤਿ ਨਾਮੁ ਕਰਤਾ ਪੁਰਖੁ": 0, "ਨਿਰਭਉ ਨਿਰਵੈਰੁ": 1}
+
+    with sqlite3.connect(database) as db:
+        db.execute("INSERT INTO Verse VALUES (3, 'ਅਜੂਨੀ ਸੈਭੰ')")
+    db.close()
+    touch_later(database)
+    asyncio.run(main.load_database_verses())
+    assert len(builds) == 2
+    assert main.VERSE_TEXTS[-1] == "ਅਜੂਨੀ ਸੈਭੰ"
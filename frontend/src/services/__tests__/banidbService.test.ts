@@ -68,4 +68,17 @@ describe('BaniDBService', () => {
     expect(fetch).toHaveBeenCalledWith('https://api.banidb.com/v2/verse/456');
     expect(result.shabad_id).toBe(123);
   });
-});
\ No newline at end of file
+
+  it('should serve a repeated shabad from the cache', async () => {
+    (fetch as jest.Mock).mockResolvedValueOnce({
+      ok: true,
+      json: async () => ({ shabadInfo: { shabadId: 321 }, verses: [] })
+    });
+
+    const first = await banidbService.getFullShabad(321);
+    const second = await banidbService.getFullShabad(321);
+
+    expect(fetch).toHaveBeenCalledTimes(1);
+    expect(second).toBe(first);
+  });
+});
@@ -36,9 +36,13 @@ export interface BaniDBSearchResult {
   raag: string;
 }
 
+// Full shabads kept in memory; the least recently used shabad is evicted beyond this
+export const SHABAD_CACHE_MAX_ENTRIES = 64;
+
 class BaniDBService {
   private baseUrl: string;
   private searchCache: Map<string, BaniDBSearchResult[]> = new Map();
+  private shabadCache: Map<string, BaniDBShabadResponse> = new Map();
 
   constructor() {
     this.baseUrl = process.env.REACT_APP_BANIDB_API_URL || 'https://api.banidb.com/v2';
@@ -125,6 +129,17 @@ class BaniDBService {
   }
 
   async getFullShabad(shabadId: number, verseId?: number): Promise<BaniDBShabadResponse> {
+    // Shabad content never changes, so a shabad shown again (e.g. the same shabad matched
+    // twice in a session) is served from memory instead of refetched
+    const cacheKey = `${shabadId}_${verseId ?? ''}`;
+    const cached = this.shabadCache.get(cacheKey);
+    if (cached) {
+      // Re-insert so the Map's insertion order tracks recency
+      this.shabadCache.delete(cacheKey);
+      this.shabadCache.set(cacheKey, cached);
+      return cached;
+    }
+
     try {
       // Try fetching full shabad from BaniDB (use plural 'shabads')
       const shabadUrl = `${this.baseUrl}/shabads/${shabadId}`;
@@ -176,6 +191,11 @@ class BaniDBService {
         verse_id: v.verseId,
       }));
 
+      // Cache the shabad, evicting the least recently used one when full
+      this.shabadCache.set(cacheKey, mapped);
+      if (this.shabadCache.size > SHABAD_CACHE_MAX_ENTRIES) {
+        this.shabadCache.delete(this.shabadCache.keys().next().value);
+      }
       return mapped;
     } catch (error) {
       console.error('BaniDB API error:', error);